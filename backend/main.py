@@ -1,32 +1,42 @@
 import os
-import json
+import asyncio
+import logging
+import orjson
 from datetime import datetime
 from typing import List, Optional
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from dotenv import load_dotenv
 
+# Load environment variables before importing modules that read their settings at import time
+try:
+    load_dotenv()
+except Exception as e:
+    print(f"Warning: Could not load .env file: {e}")
+    print("Using environment variables or defaults")
+
 from db import create_db_and_tables, get_session, Session, engine
 from models import Patient, NurseHandover, DischargeSummary, Claim, DoctorNote, OperationRecord, TAT, ServiceType, TATStatus, PatientFile, PatientFileSection1, PatientFileSection2, PatientFileSection3, PatientFileSection4, PatientFileSection5, PatientFileSection6, PatientFileSection7, PatientFileSection8, PatientFileSection9, PatientFileSection10, PatientFileSection11, PatientFileSection12
 from schemas import (
     PatientCreate, PatientRead, HandoverCreate, HandoverRead,
-    DischargeCreate, DischargeRead, ClaimValidateRequest, ClaimValidateResponse,
-    DoctorNoteCreate, DoctorNoteRead, MapRequest, TranscribeResponse, TimelineResponse,
+    DischargeCreate, DischargeRead, ClaimValidateRequest, ClaimValidateResponse, ClaimDocsAdapter,
+    DoctorNoteCreate, DoctorNoteRead, MapRequest, MapManyRequest, MapSectionsRequest, TranscribeResponse, TimelineResponse,
     OperationRecordCreate, OperationRecordRead,
     TATCreate, TATUpdate, TATRead, TATSummary,
     PatientFileCreate, PatientFileRead, PatientFileSection1Create, PatientFileSection1Read, PatientFileSection2Create, PatientFileSection2Read, PatientFileSection3Create, PatientFileSection3Read, PatientFileSection4Create, PatientFileSection4Read, PatientFileSection5Create, PatientFileSection5Read, PatientFileSection6Create, PatientFileSection6Read, PatientFileSection7Create, PatientFileSection7Read, PatientFileSection8Create, PatientFileSection8Read, PatientFileSection9Create, PatientFileSection9Read, PatientFileSection10Create, PatientFileSection10Read, PatientFileSection11Create, PatientFileSection11Read, PatientFileSection12Create, PatientFileSection12Read
 )
-from services.asr_whisper import transcribe_bytes
-from services.map_gpt import map_text, get_reference_example
+from services.asr_whisper import transcribe_bytes_async, transcribe_bytes_stream, preload_model
+from services.map_gpt import map_text, map_text_stream, map_text_many, map_text_sections, get_reference_example_bytes, warmup_clients, close_clients
 # Removed ports utility - using Railway PORT environment variable
 
-# Load environment variables
-try:
-    load_dotenv()
-except Exception as e:
-    print(f"Warning: Could not load .env file: {e}")
-    print("Using environment variables or defaults")
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 # Allowed sections for mapping
 ALLOWED_SECTIONS = {
@@ -39,6 +49,10 @@ ALLOWED_SECTIONS = {
     "patient_file_section9", "patient_file_section10", "patient_file_section11", "patient_file_section12"
 }
 
+def read_rows(schema, rows):
+    """Build Read schemas from trusted DB rows without re-running validation"""
+    return [schema.model_construct(**row.model_dump()) for row in rows]
+
 # Startup event
 from contextlib import asynccontextmanager
 
@@ -201,9 +215,24 @@ async def lifespan(app: FastAPI):
     finally:
         session.close()
     
+    # Load Whisper up front so the first transcription doesn't pay the cold start, and open the
+    # OpenAI connection pool before the first dictation arrives; both run concurrently
+    async def preload_whisper():
+        try:
+            await run_in_threadpool(preload_model)
+        except Exception as e:
+            print(f"Warning: Could not preload Whisper model: {e}")
+    
+    warmups = []
+    if os.getenv("WHISPER_PRELOAD", "1") == "1":
+        warmups.append(preload_whisper())
+    if os.getenv("OPENAI_WARMUP", "1") == "1":
+        warmups.append(warmup_clients())
+    await asyncio.gather(*warmups)
+    
     yield
     # Shutdown
-    pass
+    await close_clients()
 
 # Create FastAPI app
 app = FastAPI(
@@ -222,6 +251,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class _GZipExceptStreams(GZipMiddleware):
+    """GZip for everything but the /stream routes, which older Starlette releases would buffer whole"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON bodies (mapped forms, reference examples) for clients that accept gzip; the
+# streamed transcript/NDJSON routes bypass it so their lines arrive as they are produced
+app.add_middleware(_GZipExceptStreams, minimum_size=512, compresslevel=5)
+
 # ASR Routes
 @app.post("/api/transcribe", response_model=TranscribeResponse)
 async def transcribe_audio(
@@ -247,7 +289,7 @@ async def transcribe_audio(
             raise HTTPException(status_code=400, detail="File too small or corrupted")
         
         # Transcribe
-        text = transcribe_bytes(audio_bytes, language)
+        text = await transcribe_bytes_async(audio_bytes, language)
         return TranscribeResponse(text=text)
     except HTTPException:
         raise
@@ -258,15 +300,84 @@ async def transcribe_audio(
         print(f"Language: {language}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {error_msg}")
 
+@app.post("/api/transcribe/stream")
+async def transcribe_audio_stream(
+    file: UploadFile = File(...),
+    language: str = Form("auto")
+):
+    """Stream transcript segments as plain-text lines while Whisper decodes them"""
+    if language not in ["auto", "en", "hi"]:
+        raise HTTPException(status_code=400, detail="Only English (en) and Hindi (hi) languages are supported")
+    
+    audio_bytes = await file.read()
+    if len(audio_bytes) > 25 * 1024 * 1024:
+        raise HTTPException(status_code=400, detail="File too large. Maximum size is 25MB")
+    if len(audio_bytes) < 100:
+        raise HTTPException(status_code=400, detail="File too small or corrupted")
+    
+    # Pull the first segment before responding so decode/model errors still map to a 500
+    segments = transcribe_bytes_stream(audio_bytes, language)
+    try:
+        first = await run_in_threadpool(next, segments, None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def lines():
+        if first is not None:
+            yield first + "\n"
+            for text in segments:
+                yield text + "\n"
+    
+    return StreamingResponse(lines(), media_type="text/plain; charset=utf-8")
+
 # Mapping Routes
+def _json_response(data) -> Response:
+    """Serialize mapper output with orjson; these routes have no response_model for FastAPI's fast path"""
+    # default=dict expands the read-only mapping proxies fallback payloads are served as
+    return Response(content=orjson.dumps(data, default=dict), media_type="application/json")
+
 @app.post("/api/map/{section}")
 async def map_text_to_section(section: str, request: MapRequest):
     """Map transcribed text to structured JSON"""
     try:
         if section not in ALLOWED_SECTIONS:
             raise HTTPException(status_code=400, detail=f"Section '{section}' not allowed. Allowed sections: {list(ALLOWED_SECTIONS)}")
-        result = map_text(section, request.text, request.language)
-        return result
+        result = await map_text(section, request.text, request.language)
+        return _json_response(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Mapping failed: {str(e)}")
+
+@app.post("/api/map/{section}/stream")
+async def map_text_to_section_stream(section: str, request: MapRequest):
+    """Stream mapped fields as NDJSON lines of {"field", "value"} while the model is still decoding"""
+    if section not in ALLOWED_SECTIONS:
+        raise HTTPException(status_code=400, detail=f"Section '{section}' not allowed. Allowed sections: {list(ALLOWED_SECTIONS)}")
+    
+    async def lines():
+        async for field, value in map_text_stream(section, request.text, request.language):
+            yield orjson.dumps({"field": field, "value": value}, default=dict) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/map-many")
+async def map_many_sections(request: MapManyRequest):
+    """Map several section transcripts concurrently (e.g. all handover sections at once)"""
+    for item in request.items:
+        if item.section not in ALLOWED_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Section '{item.section}' not allowed. Allowed sections: {list(ALLOWED_SECTIONS)}")
+    try:
+        return _json_response(await map_text_many([(item.section, item.text, item.language) for item in request.items]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Mapping failed: {str(e)}")
+
+@app.post("/api/map-sections")
+async def map_sections(request: MapSectionsRequest):
+    """Map one transcript into several sections with a single model call (e.g. the whole patient file)"""
+    for section in request.sections:
+        if section not in ALLOWED_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Section '{section}' not allowed. Allowed sections: {list(ALLOWED_SECTIONS)}")
+    try:
+        return _json_response(await map_text_sections(request.sections, request.text, request.language))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Mapping failed: {str(e)}")
 
@@ -274,8 +385,8 @@ async def map_text_to_section(section: str, request: MapRequest):
 async def map_patient_admission(request: MapRequest):
     """Map transcribed text to patient admission fields"""
     try:
-        result = map_text("patient_admission", request.text, request.language)
-        return result
+        result = await map_text("patient_admission", request.text, request.language)
+        return _json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Patient mapping failed: {str(e)}")
 
@@ -283,8 +394,8 @@ async def map_patient_admission(request: MapRequest):
 async def map_admission(request: MapRequest):
     """Map transcribed text to admission fields with proper schema"""
     try:
-        result = map_text("admission", request.text, request.language)
-        return result
+        result = await map_text("admission", request.text, request.language)
+        return _json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Admission mapping failed: {str(e)}")
 
@@ -292,8 +403,7 @@ async def map_admission(request: MapRequest):
 async def get_reference(section: str):
     """Get reference example for a section type"""
     try:
-        result = get_reference_example(section)
-        return result
+        return Response(content=get_reference_example_bytes(section), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reference not found: {str(e)}")
 
@@ -312,7 +422,7 @@ async def get_patients(session: Session = Depends(get_session)):
     """Get all patients"""
     statement = select(Patient)
     patients = session.exec(statement).all()
-    return patients
+    return read_rows(PatientRead, patients)
 
 @app.get("/api/patients/{patient_id}", response_model=PatientRead)
 async def get_patient(patient_id: str, session: Session = Depends(get_session)):
@@ -461,7 +571,8 @@ async def create_note(patient_id: str, body: DoctorNoteCreate, session: Session
 @app.get("/api/patients/{patient_id}/notes", response_model=List[DoctorNoteRead])
 async def list_notes(patient_id: str, session: Session = Depends(get_session)):
     """Get all doctor notes for a patient"""
-    return session.exec(select(DoctorNote).where(DoctorNote.patient_id == patient_id).order_by(DoctorNote.created_at.desc())).all()
+    notes = session.exec(select(DoctorNote).where(DoctorNote.patient_id == patient_id).order_by(DoctorNote.created_at.desc())).all()
+    return read_rows(DoctorNoteRead, notes)
 
 # Operation Record Routes
 @app.post("/api/patients/{patient_id}/operation-records", response_model=OperationRecordRead)
@@ -483,7 +594,8 @@ async def create_operation_record(patient_id: str, operation_record: OperationRe
 @app.get("/api/patients/{patient_id}/operation-records", response_model=List[OperationRecordRead])
 async def list_operation_records(patient_id: str, session: Session = Depends(get_session)):
     """Get all operation records for a patient"""
-    return session.exec(select(OperationRecord).where(OperationRecord.patient_id == patient_id).order_by(OperationRecord.created_at.desc())).all()
+    records = session.exec(select(OperationRecord).where(OperationRecord.patient_id == patient_id).order_by(OperationRecord.created_at.desc())).all()
+    return read_rows(OperationRecordRead, records)
 
 @app.get("/api/patients/{patient_id}/operation-records/{record_id}", response_model=OperationRecordRead)
 async def get_operation_record(patient_id: str, record_id: str, session: Session = Depends(get_session)):
@@ -540,7 +652,7 @@ async def upsert_claim(patient_id: str, body: ClaimValidateRequest, session: Ses
     claim = Claim(
         patient_id=patient_id, 
         scheme=body.scheme, 
-        docs=[c.model_dump() for c in body.docs],
+        docs=ClaimDocsAdapter.dump_python(body.docs),
         readiness_score=readiness_score,
         risk=risk
     )
@@ -571,10 +683,11 @@ async def get_timeline(patient_id: str, session: Session = Depends(get_session))
     discharge_statement = select(DischargeSummary).where(DischargeSummary.patient_id == patient_id)
     discharge = session.exec(discharge_statement).first()
     
-    return TimelineResponse(
-        patient=patient,
-        handovers=handovers,
-        discharge=discharge
+    # Patient row is trusted; handover/discharge JSON columns still go through validation
+    return TimelineResponse.model_construct(
+        patient=PatientRead.model_construct(**patient.model_dump()),
+        handovers=[HandoverRead.model_validate(h, from_attributes=True) for h in handovers],
+        discharge=DischargeRead.model_validate(discharge, from_attributes=True) if discharge else None
     )
 
 # TAT Tracking Endpoints
@@ -1416,20 +1529,18 @@ async def health_check():
 async def voice_health_check():
     """Health check for voice input functionality"""
     try:
-        import subprocess
         import shutil
+        from importlib.util import find_spec
         
-        # Check if ffmpeg is available
+        # Audio is decoded in-process with PyAV; ffmpeg is only a fallback decoder
         ffmpeg_path = shutil.which("ffmpeg")
-        if not ffmpeg_path:
+        pyav = find_spec("av") is not None
+        if not pyav and not ffmpeg_path:
             return {
                 "status": "unhealthy",
-                "error": "FFmpeg not found",
-                "fix_instructions": [
-                    "Run: .\\install-ffmpeg.ps1 (PowerShell)",
-                    "Or run: install-ffmpeg.bat (Command Prompt)",
-                    "Or install manually: https://ffmpeg.org/download.html"
-                ]
+                "pyav": pyav,
+                "ffmpeg_path": ffmpeg_path,
+                "error": "No audio decoder available: install PyAV (av) or ffmpeg"
             }
         
         # Check if Whisper model can be loaded
@@ -1438,6 +1549,7 @@ async def voice_health_check():
             model = get_model()
             return {
                 "status": "healthy",
+                "pyav": pyav,
                 "ffmpeg_path": ffmpeg_path,
                 "whisper_model": "loaded",
                 "timestamp": datetime.utcnow().isoformat()
@@ -1445,6 +1557,7 @@ async def voice_health_check():
         except Exception as e:
             return {
                 "status": "unhealthy",
+                "pyav": pyav,
                 "ffmpeg_path": ffmpeg_path,
                 "error": f"Whisper model failed to load: {str(e)}"
             }
@@ -1,7 +1,23 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Literal
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, Tag, TypeAdapter
+from typing import Optional, List, Dict, Any, Literal, Union, Annotated
 from enum import Enum
+from typing_extensions import TypedDict
+
+# Identifier patterns, checked by pydantic-core's regex engine. Blank strings
+# are allowed because the forms send "" for empty fields, and Aadhaar may be
+# grouped as "1234 5678 9012" the way the mapper formats it.
+MOBILE_PATTERN = r"^(?:[6-9]\d{9})?$"
+AADHAAR_PATTERN = r"^(?:\d{4} ?\d{4} ?\d{4})?$"
+UHID_PATTERN = r"^(?:[A-Z0-9]{6,16})?$"
+
+# Shared DB metadata for patient-owned Read schemas. It comes first in a Read class's
+# bases so these fields still follow the Create fields, in the order they always had.
+class PatientRecord(BaseModel):
+    id: str
+    patient_id: str
+    created_at: datetime
+    updated_at: datetime
 
 # TAT Tracking Enums
 class ServiceType(str, Enum):
@@ -34,6 +50,8 @@ class TATUpdate(BaseModel):
     notes: Optional[str] = None
 
 class TATRead(TATCreate):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
     duration_minutes: Optional[float] = None
     created_at: datetime
@@ -52,7 +70,7 @@ class TATSummary(BaseModel):
 class OperationRecordCreate(BaseModel):
     hospital_name: str
     patient_name: str
-    uhid: str
+    uhid: str = Field(pattern=UHID_PATTERN)
     age: str
     gender: str
     ward: str
@@ -83,33 +101,40 @@ class OperationRecordCreate(BaseModel):
     anaesthesiologist_signature: str
     nursing_staff_signature: str
 
-class OperationRecordRead(OperationRecordCreate):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class OperationRecordRead(PatientRecord, OperationRecordCreate):
+    model_config = ConfigDict(extra="ignore")
+
+    # UHID_PATTERN only gates new input; rows saved before it must still serialize
+    uhid: str
 
 # Patients
 class PatientCreate(BaseModel):
     name: str
     age: int
     gender: str
-    uhid: Optional[str] = None
+    uhid: Optional[str] = Field(default=None, pattern=UHID_PATTERN)
     ward: Optional[str] = None
     bed_no: Optional[str] = None
     admission_date: Optional[str] = None
     discharge_date: Optional[str] = None
-    mobile_no: Optional[str] = None
+    mobile_no: Optional[str] = Field(default=None, pattern=MOBILE_PATTERN)
     admitted_under_doctor: Optional[str] = None
     attender_name: Optional[str] = None
     relation: Optional[str] = None
-    attender_mobile_no: Optional[str] = None
-    aadhaar_number: Optional[str] = None
+    attender_mobile_no: Optional[str] = Field(default=None, pattern=MOBILE_PATTERN)
+    aadhaar_number: Optional[str] = Field(default=None, pattern=AADHAAR_PATTERN)
     admission_time: Optional[str] = None
     bed_number: Optional[str] = None
     reason: Optional[str] = None
 
 class PatientRead(PatientCreate):
+    model_config = ConfigDict(extra="ignore")
+
+    # Format patterns only gate new input; rows saved before them must still serialize
+    uhid: Optional[str] = None
+    mobile_no: Optional[str] = None
+    attender_mobile_no: Optional[str] = None
+    aadhaar_number: Optional[str] = None
     id: str
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -153,6 +178,8 @@ class HandoverCreate(BaseModel):
     summary: Optional[Summary] = None
 
 class HandoverRead(HandoverCreate):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
     patient_id: str
     locked_at: Optional[str] = None
@@ -174,6 +201,8 @@ class DischargeCreate(BaseModel):
     follow_up: Optional[str] = None
 
 class DischargeRead(DischargeCreate):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
     patient_id: str
     created_at: datetime
@@ -189,6 +218,8 @@ class DoctorNoteCreate(BaseModel):
     advice: Optional[str] = None
 
 class DoctorNoteRead(DoctorNoteCreate):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
     patient_id: str
     created_at: datetime
@@ -196,14 +227,54 @@ class DoctorNoteRead(DoctorNoteCreate):
 # Claims Schemas
 class ClaimDoc(BaseModel):
     id: str
-    kind: str
     status: str
     issues: List[str] = []
 
+class InvoiceClaimDoc(ClaimDoc):
+    kind: Literal["invoice"]
+
+class DischargeSummaryClaimDoc(ClaimDoc):
+    kind: Literal["discharge_summary"]
+
+class LabReportClaimDoc(ClaimDoc):
+    kind: Literal["lab_report"]
+
+class PrescriptionClaimDoc(ClaimDoc):
+    kind: Literal["prescription"]
+
+class InsuranceCardClaimDoc(ClaimDoc):
+    kind: Literal["insurance_card"]
+
+class OtherClaimDoc(ClaimDoc):
+    kind: str  # "other" or any kind without its own model, kept as sent
+
+_CLAIM_DOC_KINDS = {"invoice", "discharge_summary", "lab_report", "prescription", "insurance_card"}
+
+def _claim_doc_tag(doc: Any) -> str:
+    """Variant tag for a claim doc; kinds without their own model validate as OtherClaimDoc"""
+    kind = doc.get("kind") if isinstance(doc, dict) else getattr(doc, "kind", None)
+    return kind if kind in _CLAIM_DOC_KINDS else "other"
+
+# Tagged union: pydantic dispatches on `kind` directly instead of trying each model
+ClaimDocU = Annotated[
+    Union[
+        Annotated[InvoiceClaimDoc, Tag("invoice")],
+        Annotated[DischargeSummaryClaimDoc, Tag("discharge_summary")],
+        Annotated[LabReportClaimDoc, Tag("lab_report")],
+        Annotated[PrescriptionClaimDoc, Tag("prescription")],
+        Annotated[InsuranceCardClaimDoc, Tag("insurance_card")],
+        Annotated[OtherClaimDoc, Tag("other")],
+    ],
+    Discriminator(_claim_doc_tag),
+]
+
+# Built once at import so claim doc lists are not re-schema'd per request
+ClaimDocsAdapter = TypeAdapter(List[ClaimDocU])
+
 class ClaimValidateRequest(BaseModel):
     patient_id: str
     scheme: Optional[str] = None
-    docs: List[ClaimDoc]
+    docs: List[ClaimDocU]
 
 class ClaimValidateResponse(BaseModel):
     readiness_score: int
@@ -215,6 +286,15 @@ class MapRequest(BaseModel):
     text: str
     language: Literal["en", "hi", "auto"] = "auto"
 
+class MapManyItem(MapRequest):
+    section: str
+
+class MapManyRequest(BaseModel):
+    items: List[MapManyItem]
+
+class MapSectionsRequest(MapRequest):
+    sections: List[str]
+
 class TranscribeResponse(BaseModel):
     text: str
 
@@ -225,7 +305,9 @@ class TimelineResponse(BaseModel):
     discharge: Optional[DischargeRead] = None
 
 # Patient File Schemas
-class MedicationOrder(BaseModel):
+# Table rows are TypedDicts: pydantic-core validates them as plain dicts
+# without building a model instance per row.
+class MedicationOrder(TypedDict):
     date: str
     time: str
     drug_name: str
@@ -252,35 +334,30 @@ class PatientFileSection1Create(BaseModel):
     admitted_under_doctor: Optional[str] = None
     attender_name: Optional[str] = None
     relation: Optional[str] = None
-    attender_mobile_no: Optional[str] = None
+    attender_mobile_no: Optional[str] = Field(default=None, pattern=MOBILE_PATTERN)
     drug_hypersensitivity_allergy: Optional[str] = None
     consultant: Optional[str] = None
     diagnosis: Optional[str] = None
     diet: Optional[DietInfo] = None
     medication_orders: List[MedicationOrder] = []
 
-class PatientFileSection1Read(PatientFileSection1Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection1Read(PatientRecord, PatientFileSection1Create):
+    # MOBILE_PATTERN only gates new input; rows saved before it must still serialize
+    attender_mobile_no: Optional[str] = None
 
 class PatientFileCreate(BaseModel):
     section: str
     data: Dict[str, Any]
 
-class PatientFileRead(PatientFileCreate):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileRead(PatientRecord, PatientFileCreate):
+    pass
 
 # Patient File Section 2 - Initial Assessment Form Schemas
-class CrossConsultation(BaseModel):
+class CrossConsultation(TypedDict):
     doctor_name: str
     department: str
 
-class DischargeMedication(BaseModel):
+class DischargeMedication(TypedDict):
     sl_no: int
     name: str
     dose: str
@@ -402,11 +479,8 @@ class PatientFileSection2Create(BaseModel):
     discharge_follow_up_instructions: Optional[str] = None
     discharge_cross_consultation: Optional[str] = None
 
-class PatientFileSection2Read(PatientFileSection2Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection2Read(PatientRecord, PatientFileSection2Create):
+    pass
 
 # Patient File Section 3 - Progress Notes, Vitals & Pain Monitoring Schemas
 class PatientFileSection3Create(BaseModel):
@@ -426,11 +500,8 @@ class PatientFileSection3Create(BaseModel):
     pain_vas_score: Optional[int] = None  # 0-10
     pain_description: Optional[str] = None
 
-class PatientFileSection3Read(PatientFileSection3Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection3Read(PatientRecord, PatientFileSection3Create):
+    pass
 
 # Patient File Section 4 - Diagnostics Schemas
 class PatientFileSection4Create(BaseModel):
@@ -449,11 +520,8 @@ class PatientFileSection4Create(BaseModel):
     signature: Optional[str] = None
     signature_date_time: Optional[str] = None
 
-class PatientFileSection4Read(PatientFileSection4Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection4Read(PatientRecord, PatientFileSection4Create):
+    pass
 
 # Patient File Section 5 - Patient Vitals Chart (Nursing Assessment) Schemas
 class PatientFileSection5Create(BaseModel):
@@ -491,19 +559,16 @@ class PatientFileSection5Create(BaseModel):
     nurse_signature: Optional[str] = None
     assessment_date_time: Optional[str] = None
 
-class PatientFileSection5Read(PatientFileSection5Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection5Read(PatientRecord, PatientFileSection5Create):
+    pass
 
 # Patient File Section 6 - Doctors Discharge Planning Schemas
-class DischargeMedication(BaseModel):
-    sl_no: Optional[int] = None
-    name: Optional[str] = None
-    dose: Optional[str] = None
-    frequency: Optional[str] = None
-    duration: Optional[str] = None
+class DischargeMedication(TypedDict, total=False):
+    sl_no: Optional[int]
+    name: Optional[str]
+    dose: Optional[str]
+    frequency: Optional[str]
+    duration: Optional[str]
 
 class PatientFileSection6Create(BaseModel):
     # Discharge Planning
@@ -523,11 +588,8 @@ class PatientFileSection6Create(BaseModel):
     discharge_report_in_case_of: Optional[str] = None
     doctor_name_signature: Optional[str] = None
 
-class PatientFileSection6Read(PatientFileSection6Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection6Read(PatientRecord, PatientFileSection6Create):
+    pass
 
 # Patient File Section 7 - Follow Up Instructions Schemas
 class PatientFileSection7Create(BaseModel):
@@ -536,20 +598,17 @@ class PatientFileSection7Create(BaseModel):
     cross_consultation_diagnosis: Optional[str] = None
     discharge_advice: Optional[str] = None
 
-class PatientFileSection7Read(PatientFileSection7Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection7Read(PatientRecord, PatientFileSection7Create):
+    pass
 
 # Patient File Section 8 - Nursing Care Plan / Nurse's Record Schemas
-class MedicationAdministration(BaseModel):
-    medication_name: Optional[str] = None
-    dose: Optional[str] = None
-    route: Optional[str] = None
-    time_given: Optional[str] = None
-    administered_by: Optional[str] = None
-    signature: Optional[str] = None
+class MedicationAdministration(TypedDict, total=False):
+    medication_name: Optional[str]
+    dose: Optional[str]
+    route: Optional[str]
+    time_given: Optional[str]
+    administered_by: Optional[str]
+    signature: Optional[str]
 
 class PatientFileSection8Create(BaseModel):
     # Basic Information
@@ -573,11 +632,8 @@ class PatientFileSection8Create(BaseModel):
     # Additional Notes
     additional_notes: Optional[str] = None
 
-class PatientFileSection8Read(PatientFileSection8Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection8Read(PatientRecord, PatientFileSection8Create):
+    pass
 
 # Patient File Section 9 - Intake and Output Chart Schemas
 class PatientFileSection9Create(BaseModel):
@@ -611,11 +667,8 @@ class PatientFileSection9Create(BaseModel):
     signature: Optional[str] = None
     signoff_date_time: Optional[str] = None
 
-class PatientFileSection9Read(PatientFileSection9Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection9Read(PatientRecord, PatientFileSection9Create):
+    pass
 
 # Patient File Section 10 - Nutritional Screening Schemas
 class PatientFileSection10Create(BaseModel):
@@ -653,11 +706,8 @@ class PatientFileSection10Create(BaseModel):
     screening_completed_by: Optional[str] = None
     screening_signature_date: Optional[str] = None
 
-class PatientFileSection10Read(PatientFileSection10Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection10Read(PatientRecord, PatientFileSection10Create):
+    pass
 
 # Patient File Section 11 - Nutrition Assessment Form (NAF) Schemas
 class PatientFileSection11Create(BaseModel):
@@ -691,11 +741,8 @@ class PatientFileSection11Create(BaseModel):
     assessed_by: Optional[str] = None
     assessment_signature_date: Optional[str] = None
 
-class PatientFileSection11Read(PatientFileSection11Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection11Read(PatientRecord, PatientFileSection11Create):
+    pass
 
 # Patient File Section 12 - Diet Chart Schemas
 class PatientFileSection12Create(BaseModel):
@@ -737,8 +784,5 @@ class PatientFileSection12Create(BaseModel):
     designation: Optional[str] = None
     signoff_date_time: Optional[str] = None
 
-class PatientFileSection12Read(PatientFileSection12Create):
-    id: str
-    patient_id: str
-    created_at: datetime
-    updated_at: datetime
+class PatientFileSection12Read(PatientRecord, PatientFileSection12Create):
+    pass
@@ -1,50 +1,192 @@
 import os
 import io
-import tempfile
+import asyncio
+import logging
 import re
+import hashlib
+import shutil
+import subprocess
+import threading
+import time
+import gc
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+# Threading/kernel tuning for the native libraries. These must be set before
+# numpy and CTranslate2 are imported because they are read during their static
+# init; values already present in the environment win.
+_THREADS = os.getenv("WHISPER_THREADS", str(os.cpu_count() or 4))
+for _key, _value in {
+    "OMP_NUM_THREADS": _THREADS,
+    "MKL_NUM_THREADS": _THREADS,
+    "CT2_USE_EXPERIMENTAL_PACKED_GEMM": "1",  # packed int8 GEMM kernels
+    "CT2_VERBOSE": "0",
+    "KMP_BLOCKTIME": "0",  # don't spin OpenMP threads between calls
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import av
 import numpy as np
+import ctranslate2
 from faster_whisper import WhisperModel
-from typing import Optional
-from pydub import AudioSegment
-from pydub.effects import normalize, compress_dynamic_range
-from pydub.silence import split_on_silence, detect_nonsilent
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Endpoint trimming: samples above -40 dBFS count as sound, keep 100ms around them
+_SILENCE_THRESHOLD = 10 ** (-40 / 20)
+_TRIM_PAD = SAMPLE_RATE // 10
+# Clips shorter than this (after trimming) are returned empty; Whisper only hallucinates on them
+_MIN_SAMPLES = int(0.3 * SAMPLE_RATE)
+
+_NUM_RE = re.compile(r'\d+')
+_WS_RE = re.compile(r'\s+')
+_FILLERS = frozenset({'um', 'uh', 'ah', 'er', 'mm'})
+
+# Band-limit to the voice range and level the loudness, then resample to
+# raw mono float32 PCM at 16 kHz. Shared by the PyAV graph and the ffmpeg CLI.
+# Stay in float32 even on CUDA: faster-whisper's mel extraction and Silero VAD
+# run on the host in fp32 and would upcast (copy) a float16 buffer anyway.
+_FILTERS = [("highpass", "f=80"), ("lowpass", "f=8000"), ("dynaudnorm", "f=200:g=15")]
+_FFMPEG_FILTERS = ",".join(f"{name}={args}" for name, args in _FILTERS)
+_FFMPEG_CMD = [
+    "ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+    "-ac", "1", "-ar", str(SAMPLE_RATE),
+    "-af", _FFMPEG_FILTERS,
+    "-f", "f32le", "pipe:1",
+]
 
-# Global model instance
-_model: Optional[WhisperModel] = None
+# Older CTranslate2 builds don't accept flash_attention
+_HAS_FLASH_ATTENTION = "flash_attention" in (ctranslate2.models.Whisper.__init__.__doc__ or "")
+
+def _load_model(model_name: str) -> WhisperModel:
+    """Load a Whisper model with the configured device and thread settings"""
+    device = os.getenv("WHISPER_DEVICE", "cpu")
+    kwargs = {}
+    if device == "cuda":
+        compute_type = os.getenv("WHISPER_CUDA_CT", "int8_float16")
+        # CUDA_VISIBLE_DEVICES renumbers the listed GPUs from 0
+        visible = [d for d in os.getenv("CUDA_VISIBLE_DEVICES", "0").split(",") if d.strip()]
+        kwargs["device_index"] = list(range(len(visible))) or [0]
+        if _HAS_FLASH_ATTENTION:
+            kwargs["flash_attention"] = True
+    else:
+        compute_type = "int8"
+    
+    return WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=int(os.getenv("WHISPER_THREADS", os.cpu_count() or 4)),
+        num_workers=int(os.getenv("WHISPER_WORKERS", "2")),
+        **kwargs
+    )
+
+class _ModelHolder:
+    """Lazily loaded model singleton that can release its weights while idle"""
+    
+    def __init__(self, env_var: str, default: str):
+        self.env_var = env_var
+        self.default = default
+        self.model: Optional[WhisperModel] = None
+        self.last_used = 0.0
+        self.in_flight = 0  # Decodes currently using the weights; the idle monitor leaves them loaded
+        self.lock = threading.Lock()
+    
+    def get(self) -> WhisperModel:
+        with self.lock:
+            if self.model is None:
+                self.model = _load_model(os.getenv(self.env_var, self.default))
+                _start_idle_monitor()
+            elif not self.model.model.model_is_loaded:
+                logger.info("Reloading idle Whisper model")
+                self.model.model.load_model()
+            self.last_used = time.monotonic()
+            return self.model
+    
+    @contextmanager
+    def hold(self) -> Iterator[WhisperModel]:
+        """The model, counted as in use until the block exits so it can't be unloaded mid-decode"""
+        with self.lock:
+            self.in_flight += 1
+        try:
+            yield self.get()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.last_used = time.monotonic()
+    
+    def unload_if_idle(self, idle_s: int):
+        with self.lock:
+            if (self.model is not None and self.model.model.model_is_loaded and not self.in_flight
+                    and time.monotonic() - self.last_used > idle_s):
+                logger.info("Unloading Whisper model after %ds idle", idle_s)
+                self.model.model.unload_model(to_cpu=False)
+
+_model = _ModelHolder("WHISPER_MODEL", "distil-small.en")
+_model_hi = _ModelHolder("WHISPER_MULTILINGUAL_MODEL", "small")
+
+# Optional memory savers: unload weights after WHISPER_IDLE_S seconds without
+# requests (0 keeps them resident) and force a GC pass after each transcription
+_IDLE_S = int(os.getenv("WHISPER_IDLE_S", "0"))
+_AGGRESSIVE_GC = os.getenv("WHISPER_AGGRESSIVE_GC") == "1"
+_idle_monitor: Optional[threading.Thread] = None
+
+def _start_idle_monitor():
+    """Start the background thread that unloads idle models"""
+    global _idle_monitor
+    if _IDLE_S <= 0 or _idle_monitor is not None:
+        return
+    
+    def monitor():
+        while True:
+            time.sleep(min(60, _IDLE_S))
+            _model.unload_if_idle(_IDLE_S)
+            _model_hi.unload_if_idle(_IDLE_S)
+    
+    _idle_monitor = threading.Thread(target=monitor, name="whisper-idle-monitor", daemon=True)
+    _idle_monitor.start()
 
 def get_model():
     """Get or create Whisper model singleton"""
-    global _model
-    if _model is None:
-        model_name = os.getenv("WHISPER_MODEL", "small")
-        device = os.getenv("WHISPER_DEVICE", "cpu")
-        compute_type = "int8" if device == "cpu" else "float16"
-        
-        _model = WhisperModel(
-            model_name,
-            device=device,
-            compute_type=compute_type
-        )
-    return _model
+    return _model.get()
+
+def _multilingual_holder() -> _ModelHolder:
+    """
+    Holder of a model that can detect language and transcribe Hindi.
+    Distil-Whisper only ships English weights, so when the default model is
+    English-only a multilingual model is loaded lazily as a second singleton.
+    """
+    return _model if get_model().model.is_multilingual else _model_hi
+
+def get_multilingual_model():
+    """Get a model that can detect language and transcribe Hindi"""
+    return _multilingual_holder().get()
+
+def preload_model():
+    """Load the Whisper models and run a short silent clip through them"""
+    warmup = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    model = get_model()
+    list(model.transcribe(warmup, language="en", beam_size=1, vad_filter=False)[0])
+    # The frontend records with language="auto", which detects with the multilingual model
+    multilingual = get_multilingual_model()
+    if multilingual is not model:
+        multilingual.detect_language(warmup)
 
 def _is_repetitive_numbers(text: str) -> bool:
     """
     Check if text contains repetitive number patterns that are likely hallucinations
     """
     # Extract all numbers from the text
-    numbers = re.findall(r'\d+', text)
+    numbers = _NUM_RE.findall(text)
     
     if len(numbers) < 3:
         return False
     
-    # Check for repetitive patterns (same number repeated many times)
-    number_counts = {}
-    for num in numbers:
-        number_counts[num] = number_counts.get(num, 0) + 1
-    
     # If any number appears more than 5 times, it's likely repetitive
-    max_count = max(number_counts.values()) if number_counts else 0
-    if max_count > 5:
+    if Counter(numbers).most_common(1)[0][1] > 5:
         return True
     
     # Check for alternating patterns (like "20, 25, 20, 25")
@@ -57,77 +199,217 @@ def _is_repetitive_numbers(text: str) -> bool:
     
     return False
 
-def _enhance_audio_quality(audio: AudioSegment) -> AudioSegment:
+def _trim_silence(pcm: np.ndarray) -> np.ndarray:
     """
-    Enhance audio quality for better transcription in noisy environments
+    Trim leading and trailing silence from a float32 waveform
     """
-    try:
-        # Convert to mono if stereo
-        if audio.channels > 1:
-            audio = audio.set_channels(1)
-        
-        # Normalize audio levels
-        audio = normalize(audio)
-        
-        # Apply dynamic range compression to reduce noise
-        audio = compress_dynamic_range(audio, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0)
-        
-        # Remove silence at the beginning and end
-        non_silent_ranges = detect_nonsilent(audio, min_silence_len=500, silence_thresh=-40)
-        if non_silent_ranges:
-            start_time = max(0, non_silent_ranges[0][0] - 100)  # 100ms buffer
-            end_time = min(len(audio), non_silent_ranges[-1][1] + 100)  # 100ms buffer
-            audio = audio[start_time:end_time]
-        
-        # Ensure minimum duration (at least 0.5 seconds)
-        if len(audio) < 500:
-            # Pad with silence if too short
-            silence = AudioSegment.silent(duration=500 - len(audio))
-            audio = audio + silence
-        
-        # Set optimal sample rate for Whisper (16kHz)
-        if audio.frame_rate != 16000:
-            audio = audio.set_frame_rate(16000)
+    loud = np.flatnonzero(np.abs(pcm) > _SILENCE_THRESHOLD)
+    if loud.size == 0:
+        return pcm[:0]
+    start = max(0, loud[0] - _TRIM_PAD)
+    end = min(pcm.size, loud[-1] + 1 + _TRIM_PAD)
+    return pcm[start:end]
+
+def _pull_frames(graph: av.filter.Graph, chunks: list):
+    """Drain filtered frames that are ready in the graph"""
+    while True:
+        try:
+            frame = graph.pull()
+        except (av.error.BlockingIOError, av.error.EOFError):
+            return
+        chunks.append(frame.to_ndarray().reshape(-1))
+
+def _decode_audio_av(audio_bytes: bytes) -> np.ndarray:
+    """
+    Decode and enhance audio in-process with PyAV (libav + libavfilter)
+    """
+    # BytesIO over immutable bytes shares the upload's buffer without copying,
+    # so a fresh wrapper per call is cheaper than refilling a pooled buffer
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        stream = container.streams.audio[0]
+        graph = av.filter.Graph()
+        nodes = [graph.add_abuffer(template=stream)]
+        nodes += [graph.add(name, args) for name, args in _FILTERS]
+        nodes += [
+            graph.add("aresample", str(SAMPLE_RATE)),
+            graph.add("aformat", "sample_fmts=flt:channel_layouts=mono"),
+            graph.add("abuffersink"),
+        ]
+        for src, dst in zip(nodes, nodes[1:]):
+            src.link_to(dst)
+        graph.configure()
         
-        return audio
-    except Exception as e:
-        print(f"Audio enhancement failed: {e}")
-        return audio
+        chunks = []
+        for frame in container.decode(stream):
+            graph.push(frame)
+            _pull_frames(graph, chunks)
+        graph.push(None)
+        _pull_frames(graph, chunks)
+    
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+def _decode_audio_ffmpeg(audio_bytes: bytes) -> np.ndarray:
+    """
+    Decode and enhance audio bytes with an ffmpeg subprocess
+    """
+    try:
+        proc = subprocess.Popen(_FFMPEG_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        logger.error(
+            "❌ FFmpeg not found: %s\n"
+            "🔧 To fix this issue:\n"
+            "   1. Run: .\\install-ffmpeg.ps1 (PowerShell)\n"
+            "   2. Or run: install-ffmpeg.bat (Command Prompt)\n"
+            "   3. Or install manually: https://ffmpeg.org/download.html\n"
+            "   4. Restart your terminal after installation",
+            e,
+        )
+        raise Exception("FFmpeg is required for audio processing. Please install FFmpeg and restart the server.")
 
-def _convert_audio_format(audio_bytes: bytes) -> bytes:
+    out, err = proc.communicate(audio_bytes)
+    if proc.returncode != 0:
+        raise Exception(err.decode(errors="ignore").strip() or "Audio conversion failed")
+
+    return np.frombuffer(out, dtype=np.float32)
+
+def _decode_audio(audio_bytes: bytes) -> np.ndarray:
     """
-    Convert audio bytes to enhanced WAV format for better compatibility and quality
+    Decode audio bytes into a trimmed 16 kHz mono float32 waveform
     """
     try:
-        # Try to load the audio with pydub
-        audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+        pcm = _decode_audio_av(audio_bytes)
+    except (av.error.FFmpegError, IndexError) as e:
+        if shutil.which("ffmpeg") is None:
+            raise
+        logger.warning("PyAV decoding failed (%s), falling back to ffmpeg", e)
+        pcm = _decode_audio_ffmpeg(audio_bytes)
+    return _trim_silence(pcm)
+
+# Recent transcripts keyed by (audio digest, language[, "greedy" for streamed passes]) so
+# resubmitted blobs skip Whisper
+_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_CACHE_MAX = int(os.getenv("WHISPER_CACHE_SIZE", "128"))
+_cache_lock = threading.Lock()
+
+def _cache_get(key: tuple) -> Optional[str]:
+    """Return a cached transcript and mark it as recently used"""
+    with _cache_lock:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            return _CACHE[key]
+    return None
+
+def _cache_put(key: tuple, text: str):
+    """Store a transcript, evicting the least recently used entry when full"""
+    with _cache_lock:
+        _CACHE[key] = text
+        if len(_CACHE) > _CACHE_MAX:
+            _CACHE.popitem(last=False)
+
+# Mean segment log-probability below which a greedy decode is redone with beam search
+_ESCALATE_LOGPROB = -0.9
+
+def _segments(model: WhisperModel, pcm: np.ndarray, language: str, beam_size: int, temperature: list) -> Iterator:
+    """Run one transcription pass; segments are decoded lazily as the iterator is consumed"""
+    segments, _ = model.transcribe(
+        pcm,
+        language=language,
+        beam_size=beam_size,
+        best_of=1,
+        vad_filter=True,
+        vad_parameters=dict(
+            min_silence_duration_ms=500,  # Reduced for better speech detection
+            speech_pad_ms=200,  # Add padding around speech
+            max_speech_duration_s=30  # Prevent very long segments
+        ),
+        temperature=temperature,  # Fallback temperatures when a decode trips the thresholds
+        compression_ratio_threshold=2.4,  # More lenient for noisy audio
+        log_prob_threshold=-1.0,  # More lenient confidence threshold
+        no_speech_threshold=0.6,   # More sensitive speech detection
+        condition_on_previous_text=False,  # Prevent repetition from previous context
+        initial_prompt="Medical consultation. Patient admission details. Clear speech. Name, age, contact, Aadhaar, admission date, time, ward, bed, reason."  # Enhanced context hint
+    )
+    return segments
+
+def _decode(model: WhisperModel, pcm: np.ndarray, language: str, beam_size: int, temperature: list) -> list:
+    """Run one transcription pass and return the materialized segments"""
+    return list(_segments(model, pcm, language, beam_size, temperature))
+
+def _resolve_language(pcm: np.ndarray, language: str) -> str:
+    """Map the requested language to en or hi, detecting it when set to auto"""
+    if language == "auto":
+        # Detection only encodes the first window; the full decode runs once afterwards
+        with _multilingual_holder().hold() as model:
+            detected_language, _, _ = model.detect_language(
+                pcm,
+                vad_filter=True,  # Voice activity detection
+                vad_parameters=dict(min_silence_duration_ms=500)
+            )
         
-        # Enhance audio quality
-        audio = _enhance_audio_quality(audio)
+        # Restrict to English or Hindi only for medical use in India
+        if detected_language not in ["en", "hi"]:
+            logger.info("Language '%s' not supported, defaulting to English", detected_language)
+            return "en"  # Default to English for medical terminology
+        logger.info("Detected language: %s", detected_language)
+        return detected_language
+    return language if language in ["en", "hi"] else "en"
+
+def _iter_accepted(segments) -> Iterator:
+    """Yield (text, avg_logprob) for segments that pass the noise/hallucination filters"""
+    seen_texts = set()  # Track seen text to prevent repetition
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
+    for i, segment in enumerate(segments):
+        text = segment.text.strip()
+        logprob = segment.avg_logprob
+        if debug:
+            logger.debug("🔍 Segment %d: %r (confidence: %.2f)", i + 1, text, logprob)
         
-        # Convert to WAV format with optimal settings
-        wav_buffer = io.BytesIO()
-        audio.export(
-            wav_buffer, 
-            format="wav",
-            parameters=["-ac", "1", "-ar", "16000"]  # Mono, 16kHz
-        )
-        return wav_buffer.getvalue()
-    except Exception as e:
-        error_msg = str(e).lower()
-        if "ffmpeg" in error_msg or "no such file" in error_msg:
-            print(f"❌ FFmpeg not found: {e}")
-            print("🔧 To fix this issue:")
-            print("   1. Run: .\\install-ffmpeg.ps1 (PowerShell)")
-            print("   2. Or run: install-ffmpeg.bat (Command Prompt)")
-            print("   3. Or install manually: https://ffmpeg.org/download.html")
-            print("   4. Restart your terminal after installation")
-            raise Exception("FFmpeg is required for audio processing. Please install FFmpeg and restart the server.")
-        else:
-            print(f"Audio conversion failed: {e}")
-            print("Using original audio format - this may work with Whisper")
-            # Return original bytes if conversion fails
-            return audio_bytes
+        # More lenient filtering for noisy environments; cheap numeric checks run
+        # first so rejected segments never pay for normalization or the regex
+        key = None
+        if len(text) > 1 and logprob > -1.2:  # Allow shorter segments in noise, lenient confidence
+            # Normalized key so case/spacing variants count as repeats
+            key = _WS_RE.sub(' ', text.lower())
+            if (key in seen_texts or  # Prevent repetition
+                key.strip('.,!?') in _FILLERS or  # Filter filler words
+                _is_repetitive_numbers(text)):  # Filter out number sequences
+                key = None
+        
+        if key is not None:
+            if debug:
+                logger.debug("✅ Segment %d accepted: %r", i + 1, text)
+            seen_texts.add(key)
+            yield _WS_RE.sub(' ', text), logprob
+        elif debug:
+            logger.debug("❌ Segment %d filtered out: %r (reason: confidence=%.2f, length=%d)", i + 1, text, logprob, len(text))
+
+def _transcription_error(e: Exception) -> Exception:
+    """Translate a low-level decode/transcribe failure into a user-facing error"""
+    error_msg = str(e)
+    logger.error("Transcription error: %s", error_msg)
+    
+    # Provide more specific error messages
+    if "Invalid data found when processing input" in error_msg:
+        return Exception("Invalid audio format. Please ensure the audio file is in a supported format (WebM, MP3, WAV, etc.)")
+    elif "No such file or directory" in error_msg:
+        return Exception("Audio file not found or corrupted")
+    elif "Permission denied" in error_msg:
+        return Exception("Permission denied accessing audio file")
+    return Exception(f"Transcription failed: {error_msg}")
+
+def _validate_audio(audio: bytes) -> None:
+    if not audio or len(audio) < 100:
+        raise Exception("Invalid or empty audio data")
+
+def _prepare(audio: bytes, language: str) -> Optional[tuple]:
+    """Decode audio and resolve its language and model holder; None when there is no speech"""
+    pcm = _decode_audio(audio)
+    if pcm.size < _MIN_SAMPLES:
+        return None
+    language = _resolve_language(pcm, language)
+    holder = _multilingual_holder() if language == "hi" else _model
+    return pcm, language, holder
 
 def transcribe_bytes(audio: bytes, language: str = "auto") -> str:
     """
@@ -140,144 +422,109 @@ def transcribe_bytes(audio: bytes, language: str = "auto") -> str:
     Returns:
         Transcribed text
     """
+    prepared = None
     try:
-        print(f"Transcribing audio: {len(audio)} bytes, language: {language}")
+        logger.info("Transcribing audio: %d bytes, language: %s", len(audio), language)
+        _validate_audio(audio)
         
-        # Validate audio data
-        if not audio or len(audio) < 100:
-            raise Exception("Invalid or empty audio data")
+        cache_key = (hashlib.blake2b(audio, digest_size=16).digest(), language)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.debug("📝 TRANSCRIPT (cached): %r", cached)
+            return cached
         
-        model = get_model()
+        prepared = _prepare(audio, language)
+        if prepared is None:
+            logger.info("📝 TRANSCRIPT: (empty - no speech detected)")
+            return ""
+        pcm, language, holder = prepared
         
-        # Try to convert audio to a more compatible format
-        try:
-            converted_audio = _convert_audio_format(audio)
-            audio_file = io.BytesIO(converted_audio)
-        except Exception as e:
-            print(f"Audio conversion failed, using original: {e}")
-            audio_file = io.BytesIO(audio)
+        # Transcribe with the resolved language; greedy first, beam search only if confidence is low
+        with holder.hold() as model:
+            segments_list = _decode(model, pcm, language, int(os.getenv("WHISPER_BEAM", "1")), [0.0, 0.4])
+            if segments_list and sum(seg.avg_logprob for seg in segments_list) / len(segments_list) < _ESCALATE_LOGPROB:
+                logger.info("Low confidence transcription, retrying with beam search")
+                segments_list = _decode(model, pcm, language, 5, [0.0, 0.2, 0.4, 0.6, 0.8])
         
-        # Auto-detect language if requested
-        if language == "auto":
-            # First pass: detect language (restricted to English/Hindi)
-            segments, info = model.transcribe(
-                audio_file,
-                language=None,  # Auto-detect
-                beam_size=1,
-                best_of=1,
-                vad_filter=True,  # Voice activity detection
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-            detected_language = info.language if info.language else "en"
-            
-            # Restrict to English or Hindi only for medical use in India
-            if detected_language not in ["en", "hi"]:
-                detected_language = "en"  # Default to English for medical terminology
-                print(f"Language '{info.language}' not supported, defaulting to English")
-            else:
-                print(f"Detected language: {detected_language}")
-            
-            # Reset file pointer for second pass
-            audio_file.seek(0)
-            
-            # Second pass: transcribe with detected language and enhanced noise handling
-            segments, info = model.transcribe(
-                audio_file,
-                language=detected_language,
-                beam_size=5,  # Increased for better accuracy in noise
-                best_of=5,    # Increased for better accuracy in noise
-                vad_filter=True,
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,  # Reduced for better speech detection
-                    speech_pad_ms=200,  # Add padding around speech
-                    max_speech_duration_s=30  # Prevent very long segments
-                ),
-                temperature=[0.0, 0.2, 0.4, 0.6, 0.8],  # Multiple temperatures for robustness
-                compression_ratio_threshold=2.4,  # More lenient for noisy audio
-                log_prob_threshold=-1.0,  # More lenient confidence threshold
-                no_speech_threshold=0.6,   # More sensitive speech detection
-                condition_on_previous_text=False,  # Prevent repetition from previous context
-                initial_prompt="Medical consultation. Patient admission details. Clear speech. Name, age, contact, Aadhaar, admission date, time, ward, bed, reason."  # Enhanced context hint
-            )
-        else:
-            # Transcribe with specified language and enhanced noise handling
-            segments, info = model.transcribe(
-                audio_file,
-                language=language if language in ["en", "hi"] else "en",
-                beam_size=5,  # Increased for better accuracy in noise
-                best_of=5,    # Increased for better accuracy in noise
-                vad_filter=True,
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,  # Reduced for better speech detection
-                    speech_pad_ms=200,  # Add padding around speech
-                    max_speech_duration_s=30  # Prevent very long segments
-                ),
-                temperature=[0.0, 0.2, 0.4, 0.6, 0.8],  # Multiple temperatures for robustness
-                compression_ratio_threshold=2.4,  # More lenient for noisy audio
-                log_prob_threshold=-1.0,  # More lenient confidence threshold
-                no_speech_threshold=0.6,   # More sensitive speech detection
-                condition_on_previous_text=False,  # Prevent repetition from previous context
-                initial_prompt="Medical consultation. Patient admission details. Clear speech. Name, age, contact, Aadhaar, admission date, time, ward, bed, reason."  # Enhanced context hint
-            )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Processing %d segments...", len(segments_list))
         
         # Concatenate all segments with enhanced filtering for noisy environments
         text_parts = []
-        seen_texts = set()  # Track seen text to prevent repetition
-        confidence_scores = []  # Track confidence for quality assessment
-        
-        # Convert segments to list to avoid iterator exhaustion
-        segments_list = list(segments)
-        print(f"🔍 Processing {len(segments_list)} segments...")
-        
-        for i, segment in enumerate(segments_list):
-            text = segment.text.strip()
-            print(f"🔍 Segment {i+1}: \"{text}\" (confidence: {segment.avg_logprob:.2f})")
-            
-            # More lenient filtering for noisy environments
-            if (len(text) > 1 and  # Allow shorter segments in noise
-                segment.avg_logprob > -1.2 and  # More lenient confidence threshold
-                text not in seen_texts and  # Prevent exact repetition
-                not _is_repetitive_numbers(text) and  # Filter out number sequences
-                not text.lower() in ['um', 'uh', 'ah', 'er', 'mm']):  # Filter filler words
-                
-                print(f"✅ Segment {i+1} accepted: \"{text}\"")
-                text_parts.append(text)
-                seen_texts.add(text)
-                confidence_scores.append(segment.avg_logprob)
-            else:
-                print(f"❌ Segment {i+1} filtered out: \"{text}\" (reason: confidence={segment.avg_logprob:.2f}, length={len(text)})")
+        logprob_sum = 0.0  # Running confidence total for quality assessment
+        for text, logprob in _iter_accepted(segments_list):
+            text_parts.append(text)
+            logprob_sum += logprob
         
         result = " ".join(text_parts).strip()
         
-        # Post-process result for better quality
-        if result:
-            # Remove extra whitespace
-            result = re.sub(r'\s+', ' ', result).strip()
-            
-            # Log confidence information for debugging
-            avg_confidence = np.mean(confidence_scores) if confidence_scores else -1.0
-            print(f"Transcription confidence: {avg_confidence:.2f} (segments: {len(text_parts)})")
-            
-            # Log the actual transcript text
-            print(f"📝 TRANSCRIPT: \"{result}\"")
-        
         # Return empty string if no transcription
         if not result:
-            print("📝 TRANSCRIPT: (empty - no speech detected)")
+            logger.info("📝 TRANSCRIPT: (empty - no speech detected)")
             return ""
-            
+        
+        # Log confidence information for debugging
+        logger.info("Transcription confidence: %.2f (segments: %d)", logprob_sum / len(text_parts), len(text_parts))
+        
+        # The transcript is patient data, so its text is only logged at DEBUG
+        logger.debug("📝 TRANSCRIPT: %r", result)
+        
+        _cache_put(cache_key, result)
         return result
         
     except Exception as e:
-        error_msg = str(e)
-        print(f"Transcription error: {error_msg}")
+        raise _transcription_error(e)
+    finally:
+        # Failed decodes release their buffers too; cache hits never decoded anything
+        if _AGGRESSIVE_GC and prepared is not None:
+            prepared = pcm = segments_list = None
+            gc.collect()
+
+def transcribe_bytes_stream(audio: bytes, language: str = "auto") -> Iterator[str]:
+    """
+    Yield accepted transcript segments as soon as Whisper decodes them
+    
+    Single greedy pass without the beam-search retry, so the first words arrive
+    before the clip is fully decoded. The greedy text is cached under its own key
+    so it never stands in for a full transcribe_bytes result.
+    """
+    try:
+        logger.info("Streaming transcription: %d bytes, language: %s", len(audio), language)
+        _validate_audio(audio)
+        
+        digest = hashlib.blake2b(audio, digest_size=16).digest()
+        cache_key = (digest, language, "greedy")
+        cached = _cache_get((digest, language))
+        if cached is None:
+            cached = _cache_get(cache_key)
+        if cached is not None:
+            if cached:
+                yield cached
+            return
+        
+        prepared = _prepare(audio, language)
+        if prepared is None:
+            return
+        pcm, language, holder = prepared
+        text_parts = []
+        with holder.hold() as model:
+            segments = _segments(model, pcm, language, int(os.getenv("WHISPER_BEAM", "1")), [0.0, 0.4])
+            for text, _ in _iter_accepted(segments):
+                text_parts.append(text)
+                yield text
         
-        # Provide more specific error messages
-        if "Invalid data found when processing input" in error_msg:
-            raise Exception("Invalid audio format. Please ensure the audio file is in a supported format (WebM, MP3, WAV, etc.)")
-        elif "No such file or directory" in error_msg:
-            raise Exception("Audio file not found or corrupted")
-        elif "Permission denied" in error_msg:
-            raise Exception("Permission denied accessing audio file")
-        else:
-            raise Exception(f"Transcription failed: {error_msg}")
+        result = " ".join(text_parts)
+        logger.debug("📝 TRANSCRIPT (streamed): %r", result)
+        if result:
+            _cache_put(cache_key, result)
+        
+    except Exception as e:
+        raise _transcription_error(e)
+
+async def transcribe_bytes_async(audio: bytes, language: str = "auto") -> str:
+    """
+    Transcribe audio without blocking the event loop.
+    Each upload runs straight away on a worker thread; repeats of an upload are served
+    from the transcript cache inside transcribe_bytes.
+    """
+    return await asyncio.to_thread(transcribe_bytes, audio, language)
@@ -0,0 +1,141 @@
+import re
+from typing import Any, Callable, Dict, Optional
+
+import schemas
+
+# Regex-first extraction for sections whose dictation is mostly numeric readings.
+# A transcript is only handled here when the matched readings account for all of
+# it; anything left over (notes, medications, signatures) goes to the model.
+
+_RE_BP = re.compile(r"\b(?:BP|blood pressure)\s*(?:is\s*)?(\d{2,3})\s*(?:/|by|over)\s*(\d{2,3})\b", re.I)
+_RE_HR = re.compile(r"\b(?:HR|heart rate|pulse(?: rate)?)\s*(?:is\s*)?(\d{2,3})\b", re.I)
+_RE_TEMP = re.compile(r"\btemp(?:erature)?\s*(?:is\s*)?(\d{2,3}(?:\.\d)?)\s*(?:°\s*F?|degrees?(?:\s*F)?)?", re.I)
+_RE_SPO2 = re.compile(r"\b(?:SP\s?O2|(?:oxygen\s+)?saturation)\s*(?:is\s*)?(\d{2,3})\s*%?", re.I)
+_RE_RR = re.compile(r"\b(?:RR|resp(?:iratory)?(?: rate)?)\s*(?:is\s*)?(\d{1,2})\b", re.I)
+_RE_WEIGHT = re.compile(r"\bweight\s*(?:is\s*)?(\d{1,3}(?:\.\d)?)\s*(?:kg|kilos?)?", re.I)
+_RE_GRBS = re.compile(r"\b(?:GRBS|blood sugar)\s*(?:is\s*)?(\d{2,3})\b", re.I)
+_RE_PAIN = re.compile(r"\b(?:pain|VAS)(?: score)?\s*(?:is\s*)?(10|\d)(?:\s*(?:/|out of)\s*10)?\b", re.I)
+# Only a closed set of condition words counts; any qualifier after it is leftover for the model
+_CONDITIONS = r"stable|unstable|critical|improving|deteriorating|comfortable|serious|satisfactory|fair|good|guarded"
+_RE_STATUS = re.compile(r"\b(?:patient\s+)?(?:status|condition)\s*(?:is\s*)?((?:hemodynamically\s+|clinically\s+)?(?:" + _CONDITIONS + r"))\s*(?=[,.;]|$)", re.I)
+_RE_STABLE = re.compile(r"\bpatient\s+(?:is\s+)?(stable|comfortable)\b", re.I)
+
+_ML = r"\s*(?:is\s*)?(\d{1,5})\s*(?:ml|millilit(?:er|re)s?)?\b"
+_RE_ORAL = re.compile(r"\boral(?: intake)?" + _ML, re.I)
+_RE_IV = re.compile(r"\bIV(?: fluids?)?" + _ML, re.I)
+_RE_URINE = re.compile(r"\burine(?: output)?" + _ML, re.I)
+_RE_VOMITUS = re.compile(r"\bvomit(?:us|ing)?" + _ML, re.I)
+_RE_DRAINAGE = re.compile(r"\bdrain(?:age)?" + _ML, re.I)
+# Dictated totals are recomputed from the parts, but consumed so they don't count as leftover
+_RE_TOTALS = re.compile(r"\b(?:total (?:intake|output)|net balance(?: (?:positive|negative))?)" + _ML, re.I)
+
+_RE_LEFTOVER = re.compile(r"[\s,.;:]+|\b(?:and|patient|vitals?)\b", re.I)
+
+class _Scanner:
+    """A section's patterns joined into one alternation, so the transcript is scanned in a single pass"""
+
+    def __init__(self, patterns: Dict[str, re.Pattern]):
+        self.patterns = patterns
+        self.combined = re.compile("|".join(f"(?P<{name}>{p.pattern})" for name, p in patterns.items()), re.I)
+
+    def match(self, text: str, required: tuple) -> Optional[Dict[str, re.Match]]:
+        """Return each reading's first match if the required ones hit and nothing else remains"""
+        matches, gaps, pos = {}, [], 0
+        for m in self.combined.finditer(text):
+            gaps.append(text[pos:m.start()])
+            pos = m.end()
+            name = m.lastgroup
+            if name not in matches:
+                # Re-match the span alone to get that pattern's own capture groups
+                matches[name] = self.patterns[name].match(m.group(0))
+        gaps.append(text[pos:])
+        if not all(name in matches for name in required):
+            return None
+        if _RE_LEFTOVER.sub("", " ".join(gaps)):
+            return None
+        return matches
+
+_HANDOVER_OUTGOING = _Scanner({"bp": _RE_BP, "hr": _RE_HR, "temp": _RE_TEMP, "spo2": _RE_SPO2, "status": _RE_STATUS})
+_SECTION3 = _Scanner({"bp": _RE_BP, "hr": _RE_HR, "temp": _RE_TEMP, "spo2": _RE_SPO2, "rr": _RE_RR,
+                      "pain": _RE_PAIN, "stable": _RE_STABLE})
+_SECTION5 = _Scanner({"bp": _RE_BP, "hr": _RE_HR, "temp": _RE_TEMP, "spo2": _RE_SPO2, "rr": _RE_RR,
+                      "weight": _RE_WEIGHT, "grbs": _RE_GRBS, "pain": _RE_PAIN})
+_SECTION9 = _Scanner({"oral": _RE_ORAL, "iv": _RE_IV, "urine": _RE_URINE, "vomitus": _RE_VOMITUS,
+                      "drainage": _RE_DRAINAGE, "totals": _RE_TOTALS})
+
+def _handover_outgoing(text: str) -> Optional[Dict[str, Any]]:
+    m = _HANDOVER_OUTGOING.match(text, ("bp", "hr", "temp", "spo2", "status"))
+    if m is None:
+        return None
+    return {
+        "patient_condition": m["status"].group(1).strip(),
+        "vital_signs": f"BP {m['bp'].group(1)}/{m['bp'].group(2)}, HR {m['hr'].group(1)}, Temp {m['temp'].group(1)}°F, SpO2 {m['spo2'].group(1)}%",
+        "medications": [],
+        "pending_tasks": [],
+        "special_instructions": ""
+    }
+
+def _section3(text: str) -> Optional[Dict[str, Any]]:
+    m = _SECTION3.match(text, ("bp", "hr", "temp", "spo2"))
+    if m is None:
+        return None
+    result = schemas.PatientFileSection3Create().model_dump()
+    result.update({
+        "progress_notes": f"patient {m['stable'].group(1).lower()}" if "stable" in m else None,
+        "vitals_pulse": m["hr"].group(1),
+        "vitals_blood_pressure": f"{m['bp'].group(1)}/{m['bp'].group(2)}",
+        "vitals_respiratory_rate": m["rr"].group(1) if "rr" in m else None,
+        "vitals_temperature": m["temp"].group(1),
+        "vitals_oxygen_saturation": f"{m['spo2'].group(1)}%",
+        "pain_vas_score": int(m["pain"].group(1)) if "pain" in m else None,
+    })
+    return result
+
+def _section5(text: str) -> Optional[Dict[str, Any]]:
+    m = _SECTION5.match(text, ("bp", "hr", "temp", "spo2"))
+    if m is None:
+        return None
+    result = schemas.PatientFileSection5Create().model_dump()
+    result.update({
+        "vitals_bp": f"{m['bp'].group(1)}/{m['bp'].group(2)}",
+        "vitals_pulse": m["hr"].group(1),
+        "vitals_temperature": m["temp"].group(1),
+        "vitals_respiratory_rate": m["rr"].group(1) if "rr" in m else None,
+        "vitals_weight": f"{m['weight'].group(1)}kg" if "weight" in m else None,
+        "vitals_grbs": m["grbs"].group(1) if "grbs" in m else None,
+        "vitals_saturation": f"{m['spo2'].group(1)}%",
+        "pain_score": int(m["pain"].group(1)) if "pain" in m else None,
+    })
+    return result
+
+def _section9(text: str) -> Optional[Dict[str, Any]]:
+    m = _SECTION9.match(text, ("urine",))
+    if m is None or not ("oral" in m or "iv" in m):
+        return None
+    ml = {name: int(m[name].group(1)) if name in m else 0 for name in ("oral", "iv", "urine", "vomitus", "drainage")}
+    total_intake = ml["oral"] + ml["iv"]
+    total_output = ml["urine"] + ml["vomitus"] + ml["drainage"]
+    result = schemas.PatientFileSection9Create().model_dump()
+    result.update({
+        "intake_oral": ml["oral"],
+        "intake_iv_fluids": ml["iv"],
+        "output_urine": ml["urine"],
+        "output_vomitus": ml["vomitus"],
+        "output_drainage": ml["drainage"],
+        "total_intake": total_intake,
+        "total_output": total_output,
+        "net_balance": total_intake - total_output,
+    })
+    return result
+
+_EXTRACTORS: Dict[str, Callable[[str], Optional[Dict[str, Any]]]] = {
+    "handover_outgoing": _handover_outgoing,
+    "patient_file_section3": _section3,
+    "patient_file_section5": _section5,
+    "patient_file_section9": _section9,
+}
+
+def fast_extract(section: str, text: str) -> Optional[Dict[str, Any]]:
+    """Return the mapping when regexes cover the whole transcript, else None to use the model"""
+    extractor = _EXTRACTORS.get(section)
+    return extractor(text) if extractor else None
@@ -0,0 +1,151 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Literal, Type, get_origin
+
+import schemas
+
+# Output shapes for the mapper prompts. These describe what the model returns
+# where no save schema in schemas.py matches it; every field has a default so
+# a partially filled reply still validates, and unknown keys are dropped.
+class MapOutput(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+class AdmissionMap(MapOutput):
+    name: str = ""
+    age: int = Field(0, ge=0, le=120)
+    gender: Literal["male", "female", "other", ""] = ""
+    mobile_no: str = Field("", pattern=schemas.MOBILE_PATTERN)
+    admitted_under_doctor: str = ""
+    attender_name: str = ""
+    relation: str = ""
+    attender_mobile_no: str = Field("", pattern=schemas.MOBILE_PATTERN)
+    aadhaar_number: str = Field("", pattern=schemas.AADHAAR_PATTERN)
+    admission_date: str = Field("", pattern=r"^(?:\d{4}-\d{2}-\d{2})?$")
+    admission_time: str = Field("", pattern=r"^(?:\d{2}:\d{2})?$")
+    ward: str = ""
+    bed_number: str = ""
+    reason: str = ""
+
+class DoctorNoteMap(MapOutput):
+    chief_complaint: str = ""
+    hpi: str = ""
+    physical_exam: str = ""
+    diagnosis: List[str] = []
+    orders: List[str] = []
+    prescriptions: List[str] = []
+    advice: str = ""
+
+class HandoverOutgoingMap(MapOutput):
+    patient_condition: str = ""
+    vital_signs: str = ""
+    medications: List[str] = []
+    pending_tasks: List[str] = []
+    special_instructions: str = ""
+
+class HandoverIncomingMap(MapOutput):
+    shift_summary: str = ""
+    patient_updates: str = ""
+    new_orders: List[str] = []
+    alerts: List[str] = []
+    follow_up_required: str = ""
+
+class HandoverInchargeMap(MapOutput):
+    ward_summary: str = ""
+    critical_patients: List[str] = []
+    staff_assignments: str = ""
+    equipment_status: str = ""
+    administrative_notes: str = ""
+
+class HandoverSummaryMap(MapOutput):
+    overall_condition: str = ""
+    key_events: List[str] = []
+    medication_changes: List[str] = []
+    family_communication: str = ""
+    next_shift_priorities: List[str] = []
+
+class DischargeMap(MapOutput):
+    discharge_diagnosis: List[str] = []
+    treatment_summary: str = ""
+    medications: List[str] = []
+    follow_up_instructions: str = ""
+    discharge_date: str = ""
+
+class OperationRecordSection1Map(MapOutput):
+    pre_operative_diagnosis: str = ""
+    planned_procedure: str = ""
+    pre_operative_assessment_completed: bool = False
+    informed_consent_obtained: bool = False
+
+class OperationRecordSection2Map(MapOutput):
+    surgeons: str = ""
+    assistants: str = ""
+    anaesthesiologist: str = ""
+    type_of_anaesthesia: str = ""
+    anaesthesia_medications: str = ""
+
+class OperationRecordSection3Map(MapOutput):
+    procedure_performed: str = ""
+    operative_findings: str = ""
+    estimated_blood_loss: str = ""
+    blood_iv_fluids_given: str = ""
+    specimens_removed: str = ""
+    intra_operative_events: str = ""
+    instrument_count_verified: bool = False
+
+class OperationRecordSection4Map(MapOutput):
+    post_operative_diagnosis: str = ""
+    post_operative_plan: str = ""
+    patient_condition_on_transfer: str = ""
+    transferred_to: str = ""
+    surgeon_signature: str = ""
+    anaesthesiologist_signature: str = ""
+    nursing_staff_signature: str = ""
+
+SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    "admission": AdmissionMap,
+    "doctor_note": DoctorNoteMap,
+    "handover_outgoing": HandoverOutgoingMap,
+    "handover_incoming": HandoverIncomingMap,
+    "handover_incharge": HandoverInchargeMap,
+    "handover_summary": HandoverSummaryMap,
+    "discharge": DischargeMap,
+    "operation_record_section1": OperationRecordSection1Map,
+    "operation_record_section2": OperationRecordSection2Map,
+    "operation_record_section3": OperationRecordSection3Map,
+    "operation_record_section4": OperationRecordSection4Map,
+    # Patient-file prompts return exactly the payload the section save endpoints accept. Sections 6
+    # and 8 are left out: their save schemas hold the medication table as a JSON string, while the
+    # mapper returns rows for the form to render.
+    **{f"patient_file_section{i}": getattr(schemas, f"PatientFileSection{i}Create") for i in range(1, 13) if i not in (6, 8)},
+}
+
+def _strict(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strict(n) for n in node]
+    if not isinstance(node, dict):
+        return node
+    out = {}
+    for key, value in node.items():
+        if key in ("default", "title"):
+            continue
+        # Name -> schema maps: recurse into the schemas, never treat the names as keywords
+        out[key] = {name: _strict(v) for name, v in value.items()} if key in ("properties", "$defs") else _strict(value)
+    if "properties" in out:
+        out["required"] = list(out["properties"])
+        out["additionalProperties"] = False
+    return out
+
+def strict_json_schema(model: Type[BaseModel]) -> dict:
+    """JSON Schema for OpenAI strict mode: every property required, no defaults/titles, no extra keys"""
+    return _strict(model.model_json_schema())
+
+def empty_output(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Every field of an output model with an empty value, for input that has nothing to extract"""
+    out = {}
+    for name, info in model.model_fields.items():
+        if not info.is_required():
+            out[name] = info.get_default(call_default_factory=True)
+        elif info.annotation is str:
+            out[name] = ""
+        else:
+            out[name] = [] if get_origin(info.annotation) is list else None
+    return out
@@ -0,0 +1,76 @@
+import os
+import re
+import logging
+import time
+import hashlib
+import orjson
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_RUN_RE = re.compile(r"([^\w\s])\1+")
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and repeated punctuation so re-submits hash the same"""
+    text = _PUNCT_RUN_RE.sub(r"\1", text.lower())
+    return _WS_RE.sub(" ", text).strip(" .,!?;:")
+
+class ResponseCache:
+    """In-process TTL/LRU cache for mapping results, shared through Redis when REDIS_URL is set"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600, redis_url: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._redis = None
+        if redis_url:
+            if aioredis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache only")
+            else:
+                self._redis = aioredis.from_url(redis_url)
+
+    @staticmethod
+    def key(section: str, language: str, text: str) -> str:
+        # 128-bit blake2b: cheaper than sha256 on short inputs and ample for a content-addressed key
+        return hashlib.blake2b(f"{section}|{language}|{normalize_text(text)}".encode(), digest_size=16).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is not None:
+            expires, value = item
+            if expires > time.monotonic():
+                self._items.move_to_end(key)
+                return value
+            del self._items[key]
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(f"map:{key}")
+            except Exception as e:
+                logger.warning("Redis cache get failed: %s", e)
+                return None
+            if raw is not None:
+                value = orjson.loads(raw)
+                self._store(key, value)
+                return value
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self._store(key, value)
+        if self._redis is not None:
+            try:
+                await self._redis.setex(f"map:{key}", self.ttl, orjson.dumps(value))
+            except Exception as e:
+                logger.warning("Redis cache set failed: %s", e)
+
+    def _store(self, key: str, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
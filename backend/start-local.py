@@ -4,37 +4,47 @@ Local development startup script
 """
 import os
 import sys
-import uvicorn
+from importlib.util import find_spec
 
-# Set environment variables for local development
-os.environ["OPENAI_API_KEY"] = "your_openai_api_key_here"
-os.environ["ALLOWED_ORIGIN"] = "http://localhost:5173"
-os.environ["WHISPER_MODEL"] = "small"
-os.environ["WHISPER_DEVICE"] = "cpu"
-os.environ["OPENAI_MODEL"] = "gpt-4o-mini"
+# Local development defaults; anything already exported in the shell wins
+os.environ.setdefault("OPENAI_API_KEY", "your_openai_api_key_here")
+os.environ.setdefault("ALLOWED_ORIGIN", "http://localhost:5173")
+os.environ.setdefault("WHISPER_MODEL", "small")
+os.environ.setdefault("WHISPER_DEVICE", "cpu")
+os.environ.setdefault("OPENAI_MODEL", "gpt-4o-mini")
 
 def main():
     """Start the FastAPI application for local development"""
+    # RELOAD=0 WORKERS=4 python start-local.py serves like production: one event loop per core,
+    # each worker loading its own Whisper model. Reload only works with a single process.
+    reload = os.environ.get("RELOAD", "1") == "1"
+    workers = 1 if reload else int(os.environ.get("WORKERS", "1"))
     try:
-        print("🚀 Starting GrowIt Medical Backend (Local Development)")
-        print("📊 Environment: local development")
-        print("🔗 Frontend: http://localhost:5173")
-        print("🔗 Backend: http://localhost:8000")
-        print("🔗 Health check: http://localhost:8000/api/health")
-        print("🔗 API docs: http://localhost:8000/docs")
-        
-        # Add backend directory to Python path
-        sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+        sys.stdout.write(
+            "🚀 Starting GrowIt Medical Backend (Local Development)\n"
+            "📊 Environment: local development\n"
+            "🔗 Frontend: http://localhost:5173\n"
+            "🔗 Backend: http://localhost:8000\n"
+            "🔗 Health check: http://localhost:8000/api/health\n"
+            "🔗 API docs: http://localhost:8000/docs\n"
+            f"⚙️  Auto-reload: {'on' if reload else 'off'}, workers: {workers}\n"
+        )
+        sys.stdout.flush()
         
-        # Import the FastAPI app
-        from main import app
+        # Imported only when actually serving; uvicorn pulls in a sizeable dependency tree
+        import uvicorn
         
-        # Start the server
+        # Start the server; reload needs the app as an import string, resolved from this directory
         uvicorn.run(
-            app,
+            "main:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
             host="0.0.0.0",
             port=8000,
-            reload=True,  # Enable auto-reload for development
+            reload=reload,
+            workers=workers,
+            # uvicorn[standard] brings uvloop and httptools; uvloop has no Windows build
+            loop="uvloop" if find_spec("uvloop") else "asyncio",
+            http="httptools" if find_spec("httptools") else "h11",
             log_level="info"
         )
         
@@ -1,15 +1,25 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
+from importlib.util import find_spec
+import orjson
 import uvicorn
 
 app = FastAPI()
 
+# Constant payloads, encoded once so the routes just send the bytes without response validation
+_ROOT_JSON = orjson.dumps({"Hello": "World"})
+_PATIENTS_JSON = orjson.dumps([{"id": "1", "name": "Test Patient"}])
+
 @app.get("/")
-def read_root():
-    return {"Hello": "World"}
+async def read_root():
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 @app.get("/api/patients")
-def get_patients():
-    return [{"id": "1", "name": "Test Patient"}]
+async def get_patients():
+    return Response(content=_PATIENTS_JSON, media_type="application/json")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvicorn[standard] brings uvloop and httptools; uvloop has no Windows build
+    uvicorn.run(app, host="0.0.0.0", port=8000,
+                loop="uvloop" if find_spec("uvloop") else "asyncio",
+                http="httptools" if find_spec("httptools") else "h11")
@@ -0,0 +1,15 @@
+from services.fast_extract import fast_extract
+
+VITALS = "BP 120/80, pulse 72, temp 98.6, SpO2 98%"
+
+def test_handover_outgoing_status_only():
+    result = fast_extract("handover_outgoing", f"{VITALS}, status stable")
+    assert result["patient_condition"] == "stable"
+    assert result["vital_signs"] == "BP 120/80, HR 72, Temp 98.6°F, SpO2 98%"
+
+def test_handover_outgoing_status_with_notes_goes_to_model():
+    text = f"{VITALS}, status stable but complaining of chest pain since two hours"
+    assert fast_extract("handover_outgoing", text) is None
+
+def test_handover_outgoing_unknown_condition_goes_to_model():
+    assert fast_extract("handover_outgoing", f"{VITALS}, condition drowsy and confused") is None